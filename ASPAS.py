@@ -2,19 +2,15 @@
 A script for calculating line positions and intensities
 from scanned images of atomic spectrum photoplates.
 """
-from collections import defaultdict
 import matplotlib
 matplotlib.use("TkAgg")
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-from matplotlib.widgets import Slider
+from matplotlib.collections import LineCollection
 import matplotlib.pyplot as plt
 
-from math import floor, ceil
-
 import numpy as np
 from PIL import Image, ImageTk
-from scipy.interpolate import interp1d
-from time import sleep
+from scipy.interpolate import CubicSpline
 import tkinter as tk
 from tkinter import filedialog
 from tkinter import ttk
@@ -28,55 +24,66 @@ class Data():
 
         self.plate_resolution = 2400/25.4 # px/mm
         self.plate_offset = 0 # mm
-        self.emission_lines = defaultdict(lambda: 0) # {position : intensity}
-        self.comments = defaultdict(lambda: "") # {position : comment}
+        # Parallel arrays sorted by position.
+        self.positions = np.empty(0) # Line positions.
+        self.intensities = np.empty(0) # Intensity of each line.
+        self.comment_list = [] # Comment on each line.
 
     def add_line(self, position, intensity):
-        """Adds line to line dictionary."""
-        self.emission_lines[position] = intensity
+        """Adds line to the line arrays."""
+        idx = np.searchsorted(self.positions, position)
+        self.positions = np.insert(self.positions, idx, position)
+        self.intensities = np.insert(self.intensities, idx, intensity)
+        self.comment_list.insert(idx, "")
 
     def add_comment(self, position, comment):
-        """Adds comment to comment dictionary."""
-        self.comments[position] = comment
+        """Adds comment to the line at the given position."""
+        self.comment_list[np.searchsorted(self.positions, position)] = comment
 
     def remove_line(self, position):
-        """Removes line from line and comment dictionaries."""
-        del self.emission_lines[position]
-        if self.comments[position] != "": del self.comments[position]
+        """Removes line from the line arrays."""
+        idx = np.searchsorted(self.positions, position)
+        self.positions = np.delete(self.positions, idx)
+        self.intensities = np.delete(self.intensities, idx)
+        del self.comment_list[idx]
 
     def get_positions(self):
-        """Returns list of line positions."""
-        return list(self.emission_lines.keys())
+        """Returns sorted array of line positions."""
+        return self.positions
+
+    def lines_near(self, position, tolerance=0.1):
+        """Returns saved line positions within tolerance of position."""
+        idx = np.searchsorted(self.positions, position)
+        return [p for p in self.positions[max(idx-1, 0):idx+1] if abs(p - position) < tolerance]
 
     def save_lines(self, name):
         """Writes saved data to line file."""
-        save_file = open(name, 'w')
-        save_file.write(f"Plate Resolution: {round(self.plate_resolution,3)} px/mm\n")
-        save_file.write(f"Plate Offset: {self.plate_offset} mm\n")
-        save_file.write(f" Position | Intensity | Comments\n")
-
-        for pos in sorted(self.get_positions()):
-            save_file.write(f" {pos/self.plate_resolution + self.plate_offset:>8.4f} "
-                            f" {self.emission_lines[pos]:10.3f}  "
-                            f" {self.comments[pos]}\n")
+        lines = [f"Plate Resolution: {round(self.plate_resolution,3)} px/mm\n",
+                 f"Plate Offset: {self.plate_offset} mm\n",
+                 f" Position | Intensity | Comments\n"]
+        lines.extend(f" {pos/self.plate_resolution + self.plate_offset:>8.4f} "
+                     f" {intensity:10.3f}  "
+                     f" {comment}\n"
+                     for pos, intensity, comment in zip(self.positions, self.intensities, self.comment_list))
 
+        save_file = open(name, 'w')
+        save_file.writelines(lines)
         save_file.close()
 
     def load_lines(self, name):
         """Reads saved data from line file."""
-        self.emission_lines = defaultdict(lambda: 0)
-        self.comments = defaultdict(lambda: "")
+        self.positions = np.empty(0)
+        self.intensities = np.empty(0)
+        self.comment_list = []
         lines_file = open(name, 'r').readlines()
         self.plate_resolution = float(lines_file[0].split()[2])
         self.plate_offset = float(lines_file[1].split()[2])
 
         for line in lines_file[3:]:
-            p = (float(line.split()[0]) - self.plate_offset)*self.plate_resolution
-            i = float(line.split()[1])
-            try: c = line.split()[2]
-            except: c = ""
-            self.emission_lines[p] = i
-            self.comments[p] = c
+            fields = line.split()
+            p = (float(fields[0]) - self.plate_offset)*self.plate_resolution
+            self.add_line(p, float(fields[1]))
+            if len(fields) > 2: self.add_comment(p, fields[2])
 
 
 class Comparator(ttk.Frame):
@@ -103,6 +110,14 @@ class Comparator(ttk.Frame):
         self.intensity_canvas = None
         self.mirror_canvas = None
         self.mouse_offset = 0
+        # Blitting cache for the intensity plot. The background (curve and
+        # saved lines) is redrawn only when it changes; scan-line moves
+        # restore it and blit the line on top.
+        self.int_background = None
+        self.int_background_key = None
+        self.int_scan_line = None
+        self.redraw_pending = False # Coalesces queued redraw events into one.
+        self.last_draw_state = None
 
         self.make_file_menu()
         self.make_plate_window()
@@ -127,8 +142,11 @@ class Comparator(ttk.Frame):
         self.file = tk.filedialog.askopenfilename(initialdir = ".",
                                                   title = f"Select a file",
                                                   filetypes = (("BMP files", "*.bmp*"), ("all files", "*.*")))
-        self.load_plate(self.file)
-        self.scan_plate(self.file)
+        # Decode the image once and share it between display and scanning.
+        plate_image = Image.open(self.file)
+        plate_image.load()
+        self.load_plate(plate_image)
+        self.scan_plate(plate_image)
 
     def kill(self):
         """Exits program."""
@@ -158,6 +176,8 @@ class Comparator(ttk.Frame):
         self.ax1.margins(0)
         self.ax1.axis("off")
         self.intensity_canvas = FigureCanvasTkAgg(self.intensity_figure, self)
+        # Resizing renders a new-size buffer, so the cached blit background must go.
+        self.intensity_canvas.mpl_connect("resize_event", self.int_resized)
         self.intensity_canvas.get_tk_widget().grid(row=2, column=1, columnspan=4, sticky=tk.EW, pady=5, ipadx=50)
         self.scroll_label = tk.Label(self, text="0.0000 mm")
         self.scroll_label.grid(row=3, column=3, pady=5, padx=5, sticky=tk.E)
@@ -241,31 +261,39 @@ class Comparator(ttk.Frame):
 
         tabs_frame.grid(row=4, rowspan=2, column=4, sticky=tk.NSEW, pady=5, padx=(10,0))
 
-    def load_plate(self, plate_file):
-        """Opens plate file image, rescales it, and displays it on the plate canvas."""
-        self.plate_bmp = Image.open(plate_file)
+    def load_plate(self, plate_image):
+        """Rescales the plate image and displays it on the plate canvas."""
+        self.plate_bmp = plate_image
         self.plate_width = self.plate_bmp.size[0]
         # Rescale image to 125 px tall for self.plate_canvas.
         if self.plate_bmp.size[1] != 125:
 
             self.rescaling = self.plate_bmp.size[1]/125
-            self.plate_bmp = self.plate_bmp.resize((round(i/self.rescaling) for i in self.plate_bmp.size))
+            new_size = (round(self.plate_bmp.size[0]/self.rescaling), 125)
+            self.plate_bmp = self.plate_bmp.resize(new_size, Image.BILINEAR)
 
         self.plate_photo = ImageTk.PhotoImage(self.plate_bmp)
         self.plate_canvas.create_image(0, 0, anchor=tk.NW, image=self.plate_photo)
         self.plate_canvas.config(scrollregion=(0,0,self.plate_bmp.size[0],self.plate_bmp.size[1]))
 
-    def scan_plate(self, plate_file):
+    def scan_plate(self, plate_image):
         """Scans columns of pixles and averages their intensities, interpolating subpixle values."""
-        plate_array = np.transpose(np.array(Image.open(plate_file)))
-        intensity = []
-
-        for column in plate_array:
-
-            intensity.append(256 - np.average(column))
+        # Keep the uint8 pixels as-is and accumulate in the reduction instead
+        # of materializing a float copy of the whole plate.
+        plate_array = np.asarray(plate_image.convert('L'))
+        intensity = (256.0 - plate_array.mean(axis=0, dtype=np.float64)).astype(np.float32)
+        self.intensity_arr = intensity
+        # One pixel axis built per plate, reused wherever per-column x values are needed.
+        self.px_axis = np.arange(self.plate_width, dtype=np.float32)
 
         # Extrapolated values aren't used. Only necessary for plotting.
-        self.intensity = interp1d(range(self.plate_width), intensity, kind='cubic', fill_value='extrapolate')
+        self.intensity = CubicSpline(self.px_axis, intensity,
+                                     bc_type='not-a-knot', extrapolate=True)
+        # Dense curve evaluated once; redraws slice it instead of re-evaluating
+        # the spline. float32 halves the bytes moved per redraw, and the plot
+        # needs far less precision than that anyway.
+        self.dense_px = np.arange(0, self.plate_width, 0.1, dtype=np.float32)
+        self.dense_intensity = self.intensity(self.dense_px).astype(np.float32)
 
     def redraw(self, event):
         """Redraws photoplate canvas, intensity plot, and mirror plot."""
@@ -279,68 +307,130 @@ class Comparator(ttk.Frame):
                 self.mouse_offset = min(max(event.x/self.plate_canvas.winfo_width(),0),1) # Keeps 0 <= mouse offset <= 1
                 self.mirror_slider_x.set(0) # Resets scale if plate canvas or intensity scroll bar is clicked.
 
+        # Schedule at most one redraw; rapid events collapse into it.
+        if self.redraw_pending: return
+        self.redraw_pending = True
+        self.after_idle(self.do_redraw)
+
+    def do_redraw(self):
+        """Performs the redraw scheduled by self.redraw()."""
+        self.redraw_pending = False
+
         try:
-            self.plate_redraw(event)
-            self.int_redraw(event)
+            # Left and right image boundary pixel values, computed once per redraw.
+            (lo, hi) = self.int_scroll.get()
+            L = min(max(lo*self.plate_width,0), self.plate_width)
+            R = min(max(hi*self.plate_width,0), self.plate_width)
+            # Middle value between L and R, offset to click position and mirror slider.
+            M = (L+R)/2 + (self.mouse_offset - 0.5)*(R-L) + self.mirror_slider_x.get()
+
+            # Skip the redraw entirely if nothing has changed since the last one.
+            state = (L, R, M, self.zoom.get(), tuple(self.data.get_positions()))
+            if state == self.last_draw_state: return
+            self.last_draw_state = state
+
+            self.plate_redraw(M)
+            self.int_redraw(L, R, M)
 
         except AttributeError:
             print("Error: No plate file selected. Unable to plot.")
 
+    def int_resized(self, event):
+        """Drops the blit cache when the intensity canvas is resized."""
+        self.int_background = None
+        self.int_background_key = None
+        self.last_draw_state = None
+        # The resize draw skips the animated scan line; redraw to restore it.
+        if self.file is not None: self.redraw(None)
+
+    def line_collection(self, positions, ax):
+        """Builds a single full-height LineCollection marking the given positions."""
+        segs = np.stack([np.column_stack([positions, np.zeros_like(positions)]),
+                         np.column_stack([positions, np.ones_like(positions)])], axis=1)
+        # The x axis transform spans each segment over the full axes height.
+        return LineCollection(segs, colors="#17becf", linewidths=2,
+                              transform=ax.get_xaxis_transform())
+
     def rescale_mir(self, event):
         """Redraws mirror plot based on y-axis mirror slider."""
         self.ax2.set_ylim(bottom=0, top=self.mirror_slider_y.get())
         self.mirror_canvas.draw()
 
-    def plate_redraw(self, event):
+    def plate_redraw(self, M):
         """Redraws photoplate canvas."""
         if self.scan_line is not None: self.plate_canvas.delete(self.scan_line)
-        # Left and right image boundaries.
-        (L, R) = (min(max(i*self.plate_width,0),self.plate_width) for i in self.int_scroll.get())
-        # Middle value between L and R, offset to click position and mirror slider.
-        M = (L+R)/2 + (self.mouse_offset - 0.5)*(R-L) + self.mirror_slider_x.get()
         # Scan line displayed on photoplate to indicate M.
         self.scan_line = self.plate_canvas.create_line(M/self.rescaling, 0,
                                                        M/self.rescaling, self.plate_bmp.size[1],
                                                        fill="red", width=1)
         self.plate_canvas.update_idletasks # Ensures line is drawn.
 
-    def int_redraw(self, event):
+    def int_redraw(self, L, R, M):
         """Redraws intensity canvas."""
-        # Left and right image boundary pixel values.
-        (L, R) = (min(max(i*self.plate_width,0),self.plate_width) for i in self.int_scroll.get())
-        M = (L+R)/2 + (self.mouse_offset - 0.5)*(R-L) + self.mirror_slider_x.get()
+        # Cached so add_line doesn't have to re-evaluate the spline on click.
+        self.M_intensity = float(self.intensity(M))
         # Displays scan line position.
         self.scroll_label['text'] = f'{round(M/self.data.plate_resolution + self.data.plate_offset,4)} mm'
-        px = np.arange(L, R, 0.01) # Range of pixel values to plot.
-        self.ax1.clear()
-        self.ax1.margins(0)
-        self.ax1.plot(px, self.intensity(px), color="black", linewidth=1) # Plot intensity between L and R.
-        if self.data.emission_lines != {}: # Plot any saves lines with positions between L and R.
-            for pos in self.data.get_positions():
-                if pos > L and pos < R:
-                    self.ax1.axvline(x=pos, color="#17becf", linewidth=2)
-        self.ax1.axvline(x=M, color="red", linewidth=1) # Scan line indicates position of M.
-        self.intensity_canvas.draw()
-        self.mir_redraw(event, L, M, R)
-
-    def mir_redraw(self, event, Left, Mid, Right):
+        # Sample at twice the canvas width; finer spacing can't be displayed anyway.
+        npts = max(2, self.intensity_canvas.get_tk_widget().winfo_width()*2)
+        # The background only depends on the view bounds and the saved lines.
+        key = (L, R, npts, tuple(self.data.get_positions()))
+
+        if key == self.int_background_key and self.int_background is not None:
+            # Only the scan line moved: restore the cached background and blit.
+            self.intensity_canvas.restore_region(self.int_background)
+            self.int_scan_line.set_xdata([M, M])
+            self.ax1.draw_artist(self.int_scan_line)
+            self.intensity_canvas.blit(self.ax1.bbox)
+
+        else:
+            # Full redraw, then cache the background for later blits.
+            # Slice the precomputed dense curve, strided down to the canvas width.
+            i0, i1 = int(L*10), max(int(R*10), int(L*10) + 2)
+            stride = max(1, (i1 - i0)//npts)
+            self.ax1.clear()
+            self.ax1.margins(0)
+            self.ax1.plot(self.dense_px[i0:i1:stride], self.dense_intensity[i0:i1:stride],
+                          color="black", linewidth=1) # Plot intensity between L and R.
+            positions = self.data.get_positions()
+            in_view = positions[(positions > L) & (positions < R)] # Saved lines with positions between L and R.
+            if len(in_view): # One artist for all saved lines.
+                self.ax1.add_collection(self.line_collection(in_view, self.ax1))
+            # Scan line indicates position of M. Animated so draw() skips it.
+            self.int_scan_line = self.ax1.axvline(x=M, color="red", linewidth=1, animated=True)
+            self.intensity_canvas.draw()
+            self.int_background = self.intensity_canvas.copy_from_bbox(self.ax1.bbox)
+            self.int_background_key = key
+            self.ax1.draw_artist(self.int_scan_line)
+            self.intensity_canvas.blit(self.ax1.bbox)
+
+        self.mir_redraw(L, M, R)
+
+    def mir_redraw(self, Left, Mid, Right):
         """Redraws mirror canvas."""
         # Get values from self.int_redraw().
         (L, R) = Left, Right
         self.M = Mid
         W = (R-L)/self.zoom.get() # Half-width of zoomed section.
         ML, MR = round(self.M-W,2), round(self.M+W,2) # Left and right boundaries of zoomed section.
-        px1 = np.arange(max(ML,L), min(MR,R), 0.01) # Section of plate to plot.
-        px2 = [2*self.M - i for i in px1] # Mirror-reversed section of plate.
+        # Sample at twice the canvas width; finer spacing can't be displayed anyway.
+        npts = max(2, self.mirror_canvas.get_tk_widget().winfo_width()*2)
+        # Slice the precomputed dense curve, strided down to the canvas width.
+        i0 = max(int(max(ML,L)*10), 0)
+        i1 = min(max(int(min(MR,R)*10), i0 + 2), len(self.dense_px))
+        stride = max(1, (i1 - i0)//npts)
+        px1 = self.dense_px[i0:i1:stride] # Section of plate to plot.
+        px2 = 2*self.M - px1 # Mirror-reversed section of plate.
+        y1 = self.dense_intensity[i0:i1:stride]
         self.ax2.clear()
         self.ax2.margins(0)
         self.ax2.set_ylim(bottom=0, top=self.mirror_slider_y.get())
-        self.ax2.plot(px1, self.intensity(px1), color="black",   linewidth=1) # Plot zoomed section of plate.
-        self.ax2.plot(px2, self.intensity(px1), color="#7f7f7f", linewidth=1) # Plot mirror-reversed zoomed section of plate.
-        if self.data.emission_lines != {}: # Plot any saves lines with positions between ML and MR.
-            for pos in self.data.get_positions():
-                if pos > ML and pos < MR:
-                    self.ax2.axvline(x=pos, color="#17becf", linewidth=2)
+        self.ax2.plot(px1, y1, color="black",   linewidth=1) # Plot zoomed section of plate.
+        self.ax2.plot(px2, y1, color="#7f7f7f", linewidth=1) # Plot mirror-reversed zoomed section of plate.
+        positions = self.data.get_positions()
+        in_view = positions[(positions > ML) & (positions < MR)] # Saved lines with positions between ML and MR.
+        if len(in_view): # One artist for all saved lines.
+            self.ax2.add_collection(self.line_collection(in_view, self.ax2))
         self.ax2.axvline(x=self.M, color="red", linewidth=1) # Scan line indicates position of M.
         self.mirror_canvas.draw()
 
@@ -350,16 +440,12 @@ class Comparator(ttk.Frame):
         if not (0 < self.M < self.plate_width):
             out_of_bounds = True
 
-        already_in = False
-        for pos in self.data.get_positions(): # Checks if line is already in data set to prevent duplicates.
-
-            if abs(pos - self.M) < 0.1:
-                alread_in = True
-                continue
+        # Checks if line is already in data set to prevent duplicates.
+        already_in = len(self.data.lines_near(self.M)) > 0
 
         if not already_in and not out_of_bounds:
 
-            self.data.add_line(self.M, self.intensity(self.M))
+            self.data.add_line(self.M, self.M_intensity)
             self.comment_notif.configure(text="Line added.")
             self.comment_notif.after(2000, lambda : self.comment_notif.configure(text=""))
 
@@ -379,13 +465,10 @@ class Comparator(ttk.Frame):
         """Adds comment to working data."""
         line = False
 
-        for pos in self.data.get_positions():
+        for pos in self.data.lines_near(self.M):
 
-            if abs(pos - self.M) < 0.1:
-
-                self.data.add_comment(pos, str(self.comment_entry.get()))
-                line = True
-                continue
+            self.data.add_comment(pos, str(self.comment_entry.get()))
+            line = True
 
         if line is True:
 
@@ -400,12 +483,10 @@ class Comparator(ttk.Frame):
     def delete_line(self):
         """Removes lines within 0.1 px of self.M from working data."""
         line = False
-        for pos in self.data.get_positions():
-
-            if abs(pos - self.M) < 0.1:
+        for pos in self.data.lines_near(self.M):
 
-                self.data.remove_line(pos)
-                line = True
+            self.data.remove_line(pos)
+            line = True
 
         if line is True:
 